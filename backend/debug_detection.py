@@ -5,7 +5,8 @@ Debug script to check ball and player detection.
 
 import os
 import sys
-import pickle
+# Stubs are written by utils.save_stub and are not plain pickle files, so read them back with read_stub
+from utils import read_stub
 
 def debug_detection():
     """Debug ball and player detection issues."""
@@ -23,8 +24,9 @@ def debug_detection():
     if os.path.exists(ball_stub_path):
         print(f"📄 Ball track stub found: {ball_stub_path}")
         try:
-            with open(ball_stub_path, 'rb') as f:
-                ball_tracks = pickle.load(f)
+            ball_tracks = read_stub(True, ball_stub_path)
+            if ball_tracks is None:
+                raise ValueError("stub could not be read")
             print(f"  Ball tracks length: {len(ball_tracks)}")
             
             # Check first few frames
@@ -45,8 +47,9 @@ def debug_detection():
     if os.path.exists(player_stub_path):
         print(f"\n📄 Player track stub found: {player_stub_path}")
         try:
-            with open(player_stub_path, 'rb') as f:
-                player_tracks = pickle.load(f)
+            player_tracks = read_stub(True, player_stub_path)
+            if player_tracks is None:
+                raise ValueError("stub could not be read")
             print(f"  Player tracks length: {len(player_tracks)}")
             
             # Check first few frames
@@ -67,8 +70,9 @@ def debug_detection():
     if os.path.exists(team_stub_path):
         print(f"\n📄 Team assignment stub found: {team_stub_path}")
         try:
-            with open(team_stub_path, 'rb') as f:
-                team_assignments = pickle.load(f)
+            team_assignments = read_stub(True, team_stub_path)
+            if team_assignments is None:
+                raise ValueError("stub could not be read")
             print(f"  Team assignments length: {len(team_assignments)}")
             
             # Check first few frames
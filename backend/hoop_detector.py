@@ -15,17 +15,30 @@ class HoopDetector:
         Args:
             model_path (str): The path to the YOLO model weights for hoop detection.
         """
-        try:
-            self.model = YOLO(model_path)
-            print(f"    Hoop detector initialized with model: {model_path}")
-            print(f"    Model classes: {self.model.names}")
-        except Exception as e:
-            print(f"    Warning: Could not load YOLO model: {e}")
-            self.model = None
+        self.model_path = model_path
+        self._model = None
+        self._model_loaded = False
         
         # Create a simple hoop template for template matching
         self.hoop_template = self._create_hoop_template()
 
+    @property
+    def model(self):
+        """
+        YOLO model, loaded on first use so runs served from the stub never load the weights.
+        None if the weights could not be loaded.
+        """
+        if not self._model_loaded:
+            self._model_loaded = True
+            try:
+                self._model = YOLO(self.model_path)
+                print(f"    Hoop detector initialized with model: {self.model_path}")
+                print(f"    Model classes: {self._model.names}")
+            except Exception as e:
+                print(f"    Warning: Could not load YOLO model: {e}")
+                self._model = None
+        return self._model
+
     def _create_hoop_template(self):
         """Create a simple circular template for hoop detection."""
         template_size = 60
@@ -37,18 +37,28 @@ def parse_args():
                         help='Maximum number of frames to process (for faster testing)')
     return parser.parse_args()
 
-def main():
-    args = parse_args()
-    
+def analyze(input_video, output_video=OUTPUT_VIDEO_PATH, stub_path=STUBS_DEFAULT_PATH, max_frames=None):
+    """
+    Run the full basketball analysis pipeline on a video.
+
+    Args:
+        input_video (str): Path to the input video file.
+        output_video (str): Path where the annotated video is saved.
+        stub_path (str): Directory used for cached detection stubs.
+        max_frames (int, optional): Maximum number of frames to process.
+
+    Returns:
+        dict: Events data for the frontend (also saved as events_data.json next to the output video).
+    """
     print("🚀 Starting Basketball Video Analysis...")
-    print(f"📹 Input video: {args.input_video}")
-    print(f"💾 Output video: {args.output_video}")
-    print(f"📁 Stub path: {args.stub_path}")
+    print(f"📹 Input video: {input_video}")
+    print(f"💾 Output video: {output_video}")
+    print(f"📁 Stub path: {stub_path}")
     print()
     
     # Read Video
     print("📖 Reading video file...")
-    video_frames, fps = read_video(args.input_video)
+    video_frames, fps = read_video(input_video)
     print(f"✅ Video loaded: {len(video_frames)} frames at {fps:.2f} FPS")
     
     # Calculate video duration
@@ -56,8 +66,8 @@ def main():
     print(f"⏱️ Video duration: {video_duration:.2f} seconds")
     
     # Limit frames for faster testing
-    if args.max_frames and args.max_frames < len(video_frames):
-        video_frames = video_frames[:args.max_frames]
+    if max_frames and max_frames < len(video_frames):
+        video_frames = video_frames[:max_frames]
         print(f"🔄 Limited to {len(video_frames)} frames for faster testing")
     
     print()
@@ -74,14 +84,14 @@ def main():
     print("🎯 Running player detection and tracking...")
     player_tracks = player_tracker.get_object_tracks(video_frames,
                                        read_from_stub=True,
-                                       stub_path=os.path.join(args.stub_path, 'player_track_stubs.pkl')
+                                       stub_path=os.path.join(stub_path, 'player_track_stubs.pkl')
                                       )
     print("✅ Player tracking completed")
     
     print("🏀 Running ball detection and tracking...")
     ball_tracks = ball_tracker.get_object_tracks(video_frames,
                                                  read_from_stub=True,
-                                                 stub_path=os.path.join(args.stub_path, 'ball_track_stubs.pkl')
+                                                 stub_path=os.path.join(stub_path, 'ball_track_stubs.pkl')
                                                 )
     print("✅ Ball tracking completed")
     
@@ -90,7 +100,7 @@ def main():
     hoop_detector = HoopDetector(HOOP_DETECTOR_PATH)
     hoop_positions = hoop_detector.get_hoop_positions(video_frames,
                                                      read_from_stub=True,
-                                                     stub_path=os.path.join(args.stub_path, 'hoop_positions_stub.pkl')
+                                                     stub_path=os.path.join(stub_path, 'hoop_positions_stub.pkl')
                                                      )
     print("✅ Hoop detection complete")
     print()
@@ -113,7 +123,7 @@ def main():
     player_assignment = team_assigner.get_player_teams_across_frames(video_frames,
                                                                     player_tracks,
                                                                     read_from_stub=True,
-                                                                    stub_path=os.path.join(args.stub_path, 'player_assignment_stub.pkl')
+                                                                    stub_path=os.path.join(stub_path, 'player_assignment_stub.pkl')
                                                                     )
     print("✅ Player teams assigned")
     print()
@@ -159,7 +169,7 @@ def main():
     
     # Export events data
     events_data = event_collector.export_for_frontend()
-    events_output_path = os.path.join(os.path.dirname(args.output_video), 'events_data.json')
+    events_output_path = os.path.join(os.path.dirname(output_video), 'events_data.json')
     event_collector.export_to_json(events_output_path)
     
     print(f"✅ Events collected: {len(events_data['events'])} total events")
@@ -223,10 +233,15 @@ def main():
 
     # Save video
     print("💾 Saving output video...")
-    save_video(output_video_frames, args.output_video)
-    print(f"✅ Video saved successfully to: {args.output_video}")
+    save_video(output_video_frames, output_video)
+    print(f"✅ Video saved successfully to: {output_video}")
     print()
     print("🎉 Analysis complete!")
+    return events_data
+
+def main():
+    args = parse_args()
+    analyze(args.input_video, args.output_video, args.stub_path, args.max_frames)
 
 if __name__ == '__main__':
     main()
@@ -1,6 +1,8 @@
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from cachetools import TTLCache
 import os
+import threading
 
 # Load environment variables from .env
 load_dotenv()
@@ -106,7 +108,30 @@ else:
     user_db = None
     users_collection = None
 
+# Recently read user documents keyed by email; only hits are cached
+_user_cache = TTLCache(maxsize=50000, ttl=30)
+_user_cache_lock = threading.Lock()
+
+def cache_user(email, user):
+    with _user_cache_lock:
+        _user_cache[email] = user
+
+def invalidate_user(email):
+    with _user_cache_lock:
+        _user_cache.pop(email, None)
+
 def get_user(email):
+    with _user_cache_lock:
+        user = _user_cache.get(email)
+    if user is not None:
+        return user
+    
+    user = _fetch_user(email)
+    if user is not None:
+        cache_user(email, user)
+    return user
+
+def _fetch_user(email):
     # TEMP: Always return a dummy user for testing
     if email == "1@gmail.com":
         return {
@@ -127,6 +152,7 @@ def update_user(email, updates):
     if users_collection is None:
         return 0
         
+    invalidate_user(email)
     try:
         result = users_collection.update_one(
             {"email": email},
@@ -152,6 +178,7 @@ def delete_user(email):
     if users_collection is None:
         return 0
         
+    invalidate_user(email)
     try:
         result = users_collection.delete_one({"email": email})
         return result.deleted_count
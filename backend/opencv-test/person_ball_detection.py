@@ -1,13 +1,100 @@
 import cv2
 import numpy as np
+import os
+import queue
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import torch
 from ultralytics import YOLO
 import time
 
+# Models are exported to FP16 TensorRT engines next to their .pt weights with:
+#   YOLO('basketballmodel.pt').export(format='engine', half=True, imgsz=BALL_IMGSZ, dynamic=True, batch=BATCH_SIZE)
+#   YOLO('yolov8s pose.pt').export(format='engine', half=True, imgsz=POSE_IMGSZ, dynamic=True, batch=BATCH_SIZE)
+# The inference thread sends batches of 1 to BATCH_SIZE frames, so the engines need a dynamic batch
+# dimension up to BATCH_SIZE; inference must use the imgsz each engine was exported with.
+BALL_IMGSZ = 640
+# People fill much more of a webcam frame than the ball, so pose runs at a quarter of the pixels
+POSE_IMGSZ = 320
+# Only balls above this confidence are used, so filter them before NMS instead of afterwards
+BALL_CONF = 0.5
+# Cap detections per frame to keep NMS cheap; only a handful of balls/people are ever in view
+MAX_DETECTIONS = 10
+
+# Inference device; FP16 is only used on CUDA
+DEVICE = 0 if torch.cuda.is_available() else 'cpu'
+USE_HALF = torch.cuda.is_available()
+# Frame size and imgsz never change, so the only input shapes are batches of 1 to BATCH_SIZE frames.
+# warm_up_models runs each of them once, so cuDNN's kernel autotuning finishes before the first real frame
+torch.backends.cudnn.benchmark = torch.cuda.is_available()
+
+# Webcam frames per YOLO forward pass; larger batches use the GPU better but add latency
+BATCH_SIZE = 4
+# Processed frames waiting to be drawn; small so inference can't run far ahead of the display
+RENDER_QUEUE_SIZE = 2
+# Frames whose downsampled grayscale differs from the last inferred frame by less than this
+# mean absolute value reuse that frame's detections instead of running the models
+MOTION_THRESHOLD = 2.0
+MOTION_SIZE = (160, 90)
+# Run the motion gate's color conversion, resize and diff through OpenCL (T-API) when a device is available.
+# Drawing stays on NumPy frames: OpenCV's drawing primitives have no OpenCL path.
+USE_OPENCL = cv2.ocl.haveOpenCL()
+# OpenCV worker threads; kept small so resizing/drawing doesn't compete with PyTorch for cores
+OPENCV_THREADS = 2
+
+def load_model(weights_path, task):
+    """
+    Load a YOLO model, preferring a TensorRT engine exported next to the .pt weights.
+    Falls back to the PyTorch weights if the engine is missing or can't be loaded.
+    """
+    engine_path = os.path.splitext(weights_path)[0] + '.engine'
+    if os.path.exists(engine_path):
+        try:
+            model = YOLO(engine_path, task=task)
+            print(f"Loaded TensorRT engine {engine_path}")
+            return model
+        except Exception as e:
+            print(f"Could not load {engine_path} ({e}), falling back to {weights_path}")
+    return YOLO(weights_path)
+
+# COCO keypoint indices used for step counting
+KNEE_IDX = np.array([13, 14])
+HIP_IDX = np.array([11, 12])
+
+def keypoints_to_numpy(keypoints):
+    """
+    Convert one person's keypoints (a tensor from the pose model) to a (17, 3) float ndarray of x, y, confidence.
+    """
+    if hasattr(keypoints, 'cpu'):
+        keypoints = keypoints.cpu().numpy()
+    return np.asarray(keypoints, dtype=np.float64)
+
+def run_model(model, frames, imgsz, **kwargs):
+    """
+    Run a YOLO model on a list of frames with fixed inference settings (no per-call logging).
+    Results are scaled back to the original frame size by Ultralytics.
+    Extra keyword arguments (conf, max_det, ...) are passed through to predict.
+    """
+    return model.predict(frames, imgsz=imgsz, half=USE_HALF, device=DEVICE, verbose=False, **kwargs)
+
+def warm_up_models(basketball_model, pose_model, frame_shape):
+    """
+    Run both models on blank frames shaped like the webcam frames, once for every batch size
+    the inference thread can send (1 to BATCH_SIZE), so CUDA/cuDNN initialization and kernel
+    selection for each input shape happen before the first real frame.
+    """
+    dummy_frame = np.zeros(frame_shape, dtype=np.uint8)
+    for batch_size in range(1, BATCH_SIZE + 1):
+        dummy_frames = [dummy_frame] * batch_size
+        run_model(basketball_model, dummy_frames, BALL_IMGSZ, conf=BALL_CONF, max_det=MAX_DETECTIONS)
+        run_model(pose_model, dummy_frames, POSE_IMGSZ, max_det=MAX_DETECTIONS)
+
 def is_person_holding_ball_with_hands(ball_box, pose_keypoints, threshold=8):
     """
     Check if a person is holding the basketball based on ball being extremely close to or over any keypoint.
     Returns True if the ball's bounding box overlaps with or is extremely close to any keypoint.
+    pose_keypoints is a (K, 3) array of x, y, confidence.
     """
     if not ball_box or pose_keypoints is None:
         return False
@@ -16,32 +103,25 @@ def is_person_holding_ball_with_hands(ball_box, pose_keypoints, threshold=8):
     ball_center_x = (bx1 + bx2) / 2
     ball_center_y = (by1 + by2) / 2
     
-    # Check if ANY keypoint is inside or extremely close to the ball's bounding box
-    for i, keypoint in enumerate(pose_keypoints):
-        if keypoint[2] > 0.2:  # Very low confidence threshold for extremely sensitive detection
-            keypoint_x, keypoint_y = keypoint[0], keypoint[1]
-            
-            # Check if keypoint is inside the ball's bounding box (direct overlap)
-            if bx1 <= keypoint_x <= bx2 and by1 <= keypoint_y <= by2:
-                return True
-            
-            # Check if keypoint is extremely close to the ball's bounding box edges
-            # Calculate distance from keypoint to the nearest point on the ball's bounding box
-            nearest_x = max(bx1, min(keypoint_x, bx2))
-            nearest_y = max(by1, min(keypoint_y, by2))
-            
-            distance = np.sqrt((keypoint_x - nearest_x)**2 + (keypoint_y - nearest_y)**2)
-            
-            # If keypoint is extremely close to the ball's bounding box, consider it holding
-            if distance < threshold:
-                return True
-            
-            # Additional check: distance from keypoint to ball center (for very close proximity)
-            center_distance = np.sqrt((keypoint_x - ball_center_x)**2 + (keypoint_y - ball_center_y)**2)
-            if center_distance < threshold * 2:  # Allow slightly more distance for center proximity
-                return True
+    # Only consider keypoints above a very low confidence threshold for extremely sensitive detection
+    visible = pose_keypoints[pose_keypoints[:, 2] > 0.2]
+    keypoint_x = visible[:, 0]
+    keypoint_y = visible[:, 1]
     
-    return False
+    # Distance from each keypoint to the nearest point on the ball's bounding box
+    # (zero when the keypoint is inside the box, i.e. a direct overlap)
+    # Distances are compared squared against squared thresholds, so no square roots are needed
+    dx = keypoint_x - np.clip(keypoint_x, bx1, bx2)
+    dy = keypoint_y - np.clip(keypoint_y, by1, by2)
+    distance_sq = dx * dx + dy * dy
+    
+    # Additional check: distance from keypoint to ball center (for very close proximity),
+    # allowing slightly more distance for center proximity
+    cx = keypoint_x - ball_center_x
+    cy = keypoint_y - ball_center_y
+    center_distance_sq = cx * cx + cy * cy
+    
+    return bool(np.any(distance_sq < threshold * threshold) or np.any(center_distance_sq < (threshold * 2) ** 2))
 
 def get_person_center_from_pose(pose_keypoints):
     """
@@ -51,23 +131,28 @@ def get_person_center_from_pose(pose_keypoints):
         return None
     
     # Get all visible keypoints
-    visible_keypoints = []
-    for keypoint in pose_keypoints:
-        if keypoint[2] > 0.4:  # Confidence threshold
-            visible_keypoints.append([keypoint[0], keypoint[1]])
+    visible_keypoints = pose_keypoints[pose_keypoints[:, 2] > 0.4, :2]  # Confidence threshold
     
-    if not visible_keypoints:
+    if len(visible_keypoints) == 0:
         return None
     
     # Calculate center from visible keypoints
-    x_coords = [kp[0] for kp in visible_keypoints]
-    y_coords = [kp[1] for kp in visible_keypoints]
-    
-    center_x = sum(x_coords) / len(x_coords)
-    center_y = sum(y_coords) / len(y_coords)
+    center_x, center_y = visible_keypoints.mean(axis=0)
     
     return (center_x, center_y)
 
+def mean_visible_point(pose_keypoints, indices, conf_threshold=0.4):
+    """
+    Average (x, y) of the given keypoints that pass the confidence threshold, or None if none do.
+    YOLO pose always returns all 17 COCO keypoints per person, so indices need no bounds check.
+    """
+    points = pose_keypoints[indices]
+    points = points[points[:, 2] > conf_threshold]
+    if len(points) == 0:
+        return None
+    x, y = points[:, :2].mean(axis=0)
+    return (x, y)
+
 def detect_steps(knee_positions, hip_positions, step_threshold=20):
     """
     Detect steps based on knee movement relative to hip positions.
@@ -143,299 +228,414 @@ def detect_traveling(ball_positions, knee_positions, holding_frames, travel_thre
     
     return False
 
-def main():
-    # Open the webcam
-    print("Attempting to open webcam...")
-    cap = cv2.VideoCapture(0, cv2.CAP_AVFOUNDATION)
-    
-    if not cap.isOpened():
-        print("Error: Could not open video stream.")
-        sys.exit()
+def extract_ball_boxes(basketball_results, class_names):
+    """
+    Collect high-confidence basketball boxes as (x1, y1, x2, y2, confidence) tuples.
+    """
+    # Get basketball detections
+    ball_boxes = []
+    for r in basketball_results:
+        for box in r.boxes:
+            class_id = int(box.cls[0])
+            class_name = class_names[class_id]
+            
+            # Get bounding box coordinates
+            x1, y1, x2, y2 = box.xyxy[0]
+            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+            confidence = float(box.conf[0])
+            
+            # Only include high-confidence detections
+            if confidence > BALL_CONF:
+                ball_boxes.append((x1, y1, x2, y2, confidence))
     
-    print("Webcam opened successfully. Now loading YOLO models...")
+    return ball_boxes
+
+class TrackingState:
+    """
+    Possession and travel tracking state carried across frames.
+    """
+    def __init__(self):
+        self.ball_positions = []  # Track ball position history
+        self.knee_positions = []  # Track knee positions for step counting
+        self.hip_positions = []  # Track hip positions for step counting
+        self.was_holding = False  # Track previous frame's holding state
+        self.current_holder = None  # Track which person is currently holding the ball
+        self.holding_frames = 0  # Count frames of continuous holding
+        self.traveling_detected = False  # Flag for travel detection
+        self.last_announcement_time = float('-inf')  # Track when we last announced holding (time.monotonic())
+
+def read_frame(cap, max_retries=5):
+    """
+    Read a frame from the video with retry logic. Returns None if no frame could be grabbed.
+    """
+    retry_count = 0
+    while retry_count < max_retries:
+        success, frame = cap.read()
+        if success:
+            return frame
+        retry_count += 1
+        print(f"Failed to grab frame, attempt {retry_count}/{max_retries}")
+        time.sleep(0.1)  # Wait 100ms before retrying (HighGUI calls must stay on the main thread)
     
-    # Load only the pose and basketball models
-    basketball_model = YOLO('basketballmodel.pt')
-    pose_model = YOLO('yolov8s pose.pt')
+    print(f"Failed to grab frame after {max_retries} attempts. Exiting...")
+    return None
+
+def process_frame(frame, ball_boxes, pose_results, state, current_time):
+    """
+    Update possession/travel tracking for one frame and draw the overlays onto it.
+    pose_results holds the pose model's results for this frame only.
+    current_time is the frame's time.monotonic() timestamp, read once by the caller.
+    """
+    ball_positions = state.ball_positions
+    knee_positions = state.knee_positions
+    hip_positions = state.hip_positions
     
-    print("YOLO models loaded.")
-    print("Basketball detection with travel detection active. Press 'q' to quit.")
+    # Track ball and person positions
+    current_holding = False
+    current_holder_id = None
+    current_holder_pose = None
+    current_knee_pos = None
+    current_hip_pos = None
+    current_person_center = None
     
-    # Initialize variables for tracking
-    ball_positions = []  # Track ball position history
-    knee_positions = []  # Track knee positions for step counting
-    hip_positions = []  # Track hip positions for step counting
-    was_holding = False  # Track previous frame's holding state
-    current_holder = None  # Track which person is currently holding the ball
-    holding_frames = 0  # Count frames of continuous holding
-    traveling_detected = False  # Flag for travel detection
-    last_announcement_time = 0  # Track when we last announced holding
-    
-    while cap.isOpened():
-        # Read a frame from the video with retry logic
-        success = False
-        retry_count = 0
-        max_retries = 5
-        
-        while not success and retry_count < max_retries:
-            success, frame = cap.read()
-            if not success:
-                retry_count += 1
-                print(f"Failed to grab frame, attempt {retry_count}/{max_retries}")
-                cv2.waitKey(100)  # Wait 100ms before retrying
-        
-        if not success:
-            print(f"Failed to grab frame after {max_retries} attempts. Exiting...")
-            break
+    if ball_boxes and pose_results:
+        ball_x, ball_y, ball_w, ball_h, ball_area = ball_boxes[0]
+        ball_center_x = ball_x + ball_w / 2
+        ball_center_y = ball_y + ball_h / 2
         
-        # Reset retry count on successful frame grab
-        retry_count = 0
+        # Add current ball position to history
+        ball_positions.append((ball_center_x, ball_center_y))
         
-        # Detect basketballs using basketball model
-        basketball_results = basketball_model(frame)
+        # Keep only recent ball history (last 30 frames)
+        if len(ball_positions) > 30:
+            ball_positions.pop(0)
         
-        # Get basketball detections
-        ball_boxes = []
-        for r in basketball_results:
-            for box in r.boxes:
-                class_id = int(box.cls[0])
-                class_name = basketball_model.names[class_id]
-                
-                # Get bounding box coordinates
-                x1, y1, x2, y2 = box.xyxy[0]
-                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                confidence = float(box.conf[0])
+        # Check which person is holding the ball using hand positions
+        for i, pose_result in enumerate(pose_results):
+            if pose_result.keypoints is not None and len(pose_result.keypoints.data) > 0:
+                person_pose_keypoints = keypoints_to_numpy(pose_result.keypoints.data[0])
                 
-                # Only include high-confidence detections
-                if confidence > 0.5:
-                    ball_boxes.append((x1, y1, x2, y2, confidence))
-        
-        # Detect pose using pose model
-        pose_results = pose_model(frame)
-        
-        # Track ball and person positions
-        current_holding = False
-        current_holder_id = None
-        current_holder_pose = None
-        current_knee_pos = None
-        current_hip_pos = None
-        current_person_center = None
+                if is_person_holding_ball_with_hands(ball_boxes[0], person_pose_keypoints):
+                    current_holding = True
+                    current_holder_id = i
+                    current_holder_pose = person_pose_keypoints
+                    
+                    # Get person center from pose keypoints
+                    current_person_center = get_person_center_from_pose(person_pose_keypoints)
+                    
+                    # Get knee and hip positions for step counting (keypoints 13 and 14 for knees, 11 and 12 for hips),
+                    # averaging left and right when both are visible
+                    current_knee_pos = mean_visible_point(person_pose_keypoints, KNEE_IDX)
+                    current_hip_pos = mean_visible_point(person_pose_keypoints, HIP_IDX)
+                    
+                    break
+    
+    # Track knee and hip positions for step counting
+    if current_knee_pos is not None and current_hip_pos is not None:
+        knee_positions.append(current_knee_pos)
+        hip_positions.append(current_hip_pos)
+    else:
+        knee_positions.append(None)
+        hip_positions.append(None)
+    
+    # Keep only recent knee and hip history (last 30 frames)
+    if len(knee_positions) > 30:
+        knee_positions.pop(0)
+        hip_positions.pop(0)
+    
+    # Update holding state and detect traveling
+    if current_holding and state.was_holding and current_holder_id == state.current_holder:
+        # Same person has continuous possession
+        state.holding_frames += 1
         
-        if ball_boxes and pose_results:
-            ball_x, ball_y, ball_w, ball_h, ball_area = ball_boxes[0]
-            ball_center_x = ball_x + ball_w / 2
-            ball_center_y = ball_y + ball_h / 2
+        # Check for traveling after some frames of holding
+        if state.holding_frames > 5 and not state.traveling_detected:
+            if detect_traveling(ball_positions, knee_positions, state.holding_frames):
+                state.traveling_detected = True
+                print(f"TRAVELING DETECTED! Player {current_holder_id} ball moving horizontally above knees!")
+    else:
+        # Possession changed or lost
+        if current_holding and not state.was_holding:
+            # New possession
+            state.current_holder = current_holder_id
+            state.holding_frames = 1
+            state.traveling_detected = False
             
-            # Add current ball position to history
-            ball_positions.append((ball_center_x, ball_center_y))
+            print(f"Player {current_holder_id} gained possession")
             
-            # Keep only recent ball history (last 30 frames)
-            if len(ball_positions) > 30:
-                ball_positions.pop(0)
+            # Announce holding detection
+            if current_time - state.last_announcement_time > 2:  # Announce every 2 seconds max
+                print(f"PLAYER {current_holder_id} IS HOLDING THE BALL!")
+                state.last_announcement_time = current_time
+        
+        elif not current_holding and state.was_holding:
+            # Lost possession
+            print(f"Player {state.current_holder} lost possession")
+            state.traveling_detected = False
+    
+    # Update previous state
+    state.was_holding = current_holding
+    
+    # Draw pose keypoints for all detected people
+    for i, pose_result in enumerate(pose_results):
+        if pose_result.keypoints is not None and len(pose_result.keypoints.data) > 0:
+            keypoints = keypoints_to_numpy(pose_result.keypoints.data[0])
             
-            # Check which person is holding the ball using hand positions
-            for i, pose_result in enumerate(pose_results):
-                if pose_result.keypoints is not None and len(pose_result.keypoints.data) > 0:
-                    person_pose_keypoints = pose_result.keypoints.data[0]
+            # Check if this person is holding the basketball
+            is_holding = (i == current_holder_id)
+            
+            # Draw keypoints for each person
+            for j, keypoint in enumerate(keypoints):
+                if keypoint[2] > 0.4:  # Confidence threshold
+                    x, y = int(keypoint[0]), int(keypoint[1])
                     
-                    if is_person_holding_ball_with_hands(ball_boxes[0], person_pose_keypoints):
-                        current_holding = True
-                        current_holder_id = i
-                        current_holder_pose = person_pose_keypoints
-                        
-                        # Get person center from pose keypoints
-                        current_person_center = get_person_center_from_pose(person_pose_keypoints)
-                        
-                        # Get knee and hip positions for step counting (keypoints 13 and 14 for knees, 11 and 12 for hips)
-                        left_knee = person_pose_keypoints[13] if len(person_pose_keypoints) > 13 and person_pose_keypoints[13][2] > 0.4 else None
-                        right_knee = person_pose_keypoints[14] if len(person_pose_keypoints) > 14 and person_pose_keypoints[14][2] > 0.4 else None
-                        left_hip = person_pose_keypoints[11] if len(person_pose_keypoints) > 11 and person_pose_keypoints[11][2] > 0.4 else None
-                        right_hip = person_pose_keypoints[12] if len(person_pose_keypoints) > 12 and person_pose_keypoints[12][2] > 0.4 else None
-                        
-                        # Use the knee with higher confidence, or average if both are visible
-                        if left_knee is not None and right_knee is not None:
-                            current_knee_pos = ((left_knee[0] + right_knee[0]) / 2, (left_knee[1] + right_knee[1]) / 2)
-                        elif left_knee is not None:
-                            current_knee_pos = (left_knee[0], left_knee[1])
-                        elif right_knee is not None:
-                            current_knee_pos = (right_knee[0], right_knee[1])
-                        
-                        # Use the hip with higher confidence, or average if both are visible
-                        if left_hip is not None and right_hip is not None:
-                            current_hip_pos = ((left_hip[0] + right_hip[0]) / 2, (left_hip[1] + right_hip[1]) / 2)
-                        elif left_hip is not None:
-                            current_hip_pos = (left_hip[0], left_hip[1])
-                        elif right_hip is not None:
-                            current_hip_pos = (right_hip[0], right_hip[1])
+                    # Special highlighting for wrists (keypoints 9 and 10) of current holder
+                    if j == 9:  # Left wrist
+                        if is_holding:
+                            color = (0, 255, 255)  # Bright yellow for current holder
+                            radius = 12
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                            cv2.putText(frame, "L Hand", (x + 5, y - 5), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+                        else:
+                            color = (0, 255, 255)  # Yellow for others
+                            radius = 8
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                    elif j == 10:  # Right wrist
+                        if is_holding:
+                            color = (255, 0, 255)  # Bright magenta for current holder
+                            radius = 12
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                            cv2.putText(frame, "R Hand", (x + 5, y - 5), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+                        else:
+                            color = (255, 0, 255)  # Magenta for others
+                            radius = 8
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                    elif j in [13, 14]:  # Knees - highlight for step tracking
+                        if is_holding:
+                            color = (255, 255, 0)  # Bright cyan for current holder
+                            radius = 10
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                            cv2.putText(frame, "Knee", (x + 5, y - 5), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+                        else:
+                            color = (255, 255, 0)  # Cyan for others
+                            radius = 6
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                    elif j in [11, 12]:  # Hips - highlight for step tracking
+                        if is_holding:
+                            color = (255, 255, 0)  # Bright cyan for current holder
+                            radius = 10
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                            cv2.putText(frame, "Hip", (x + 5, y - 5), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+                        else:
+                            color = (255, 255, 0)  # Cyan for others
+                            radius = 6
+                            cv2.circle(frame, (x, y), radius, color, -1)
+                    else:
+                        # Different colors for different body parts
+                        if j < 5:  # Head and torso
+                            color = (255, 255, 0)  # Cyan
+                        elif j < 11:  # Arms
+                            color = (0, 255, 255)  # Yellow
+                        elif j < 17:  # Legs
+                            color = (255, 0, 255)  # Magenta
+                        else:  # Hands and feet
+                            color = (0, 255, 0)  # Green
                         
-                        break
-        
-        # Track knee and hip positions for step counting
-        if current_knee_pos is not None and current_hip_pos is not None:
-            knee_positions.append(current_knee_pos)
-            hip_positions.append(current_hip_pos)
-        else:
-            knee_positions.append(None)
-            hip_positions.append(None)
-        
-        # Keep only recent knee and hip history (last 30 frames)
-        if len(knee_positions) > 30:
-            knee_positions.pop(0)
-            hip_positions.pop(0)
-        
-        # Update holding state and detect traveling
-        if current_holding and was_holding and current_holder_id == current_holder:
-            # Same person has continuous possession
-            holding_frames += 1
+                        # Make keypoints larger for the current holder
+                        radius = 6 if is_holding else 4
+                        cv2.circle(frame, (x, y), radius, color, -1)
             
-            # Check for traveling after some frames of holding
-            if holding_frames > 5 and not traveling_detected:
-                if detect_traveling(ball_positions, knee_positions, holding_frames):
-                    traveling_detected = True
-                    print(f"TRAVELING DETECTED! Player {current_holder_id} ball moving horizontally above knees!")
-        else:
-            # Possession changed or lost
-            if current_holding and not was_holding:
-                # New possession
-                current_holder = current_holder_id
-                holding_frames = 1
-                traveling_detected = False
-                
-                print(f"Player {current_holder_id} gained possession")
-                
-                # Announce holding detection
-                current_time = time.time()
-                if current_time - last_announcement_time > 2:  # Announce every 2 seconds max
-                    print(f"PLAYER {current_holder_id} IS HOLDING THE BALL!")
-                    last_announcement_time = current_time
-                    
-            elif not current_holding and was_holding:
-                # Lost possession
-                print(f"Player {current_holder} lost possession")
-                traveling_detected = False
-        
-        # Update previous state
-        was_holding = current_holding
-        
-        # Draw pose keypoints for all detected people
-        for i, pose_result in enumerate(pose_results):
-            if pose_result.keypoints is not None and len(pose_result.keypoints.data) > 0:
-                keypoints = pose_result.keypoints.data[0]
+            # Draw player ID and status near the person's center
+            if current_person_center and is_holding:
+                center_x, center_y = int(current_person_center[0]), int(current_person_center[1])
+                cv2.putText(frame, f"Player {i} - HOLDING", (center_x - 50, center_y - 50), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+            elif current_person_center:
+                center_x, center_y = int(current_person_center[0]), int(current_person_center[1])
+                cv2.putText(frame, f"Player {i}", (center_x - 30, center_y - 50), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
+    # Draw bounding boxes for basketballs (green)
+    for (x1, y1, x2, y2, confidence) in ball_boxes:
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)  # Green for basketballs
+        cv2.putText(frame, f"Basketball ({confidence:.2f})", (x1, y1 - 10), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    
+    # Display travel status prominently
+    if state.traveling_detected:
+        cv2.putText(frame, "TRAVELING DETECTED!", (10, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 3)
+        cv2.putText(frame, "3+ STEPS WITHOUT DRIBBLING", (10, 70), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+    
+    # Display holding status
+    if current_holder_id is not None:
+        cv2.putText(frame, f"Player {current_holder_id} is HOLDING the ball", (10, 110), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        cv2.putText(frame, f"Holding for {state.holding_frames} frames", (10, 140), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
+    # Display ball position and movement info
+    if current_holder_id is not None and state.holding_frames > 5 and ball_positions and knee_positions:
+        if ball_positions[-1] is not None and knee_positions[-1] is not None:
+            ball_y = ball_positions[-1][1]
+            knee_y = knee_positions[-1][1]
+            ball_above_knees = ball_y < knee_y
+            
+            # Calculate horizontal movement
+            if len(ball_positions) >= 10:
+                recent_x_positions = [pos[0] for pos in ball_positions[-10:] if pos is not None]
+                if recent_x_positions:
+                    horizontal_movement = max(recent_x_positions) - min(recent_x_positions)
+                    cv2.putText(frame, f"Ball above knees: {'YES' if ball_above_knees else 'NO'}", (10, 170), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                    cv2.putText(frame, f"Horizontal movement: {horizontal_movement:.1f}px", (10, 200), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+def put_until_stopped(q, item, stop_event):
+    """
+    Put an item on a bounded queue, giving up if the pipeline is shutting down.
+    """
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def capture_loop(cap, frames_q, stop_event):
+    """
+    Capture thread: read webcam frames until the stream ends or the pipeline stops.
+    A None is queued at the end, even if capture fails, so the inference thread knows to finish.
+    """
+    try:
+        while not stop_event.is_set() and cap.isOpened():
+            frame = read_frame(cap)
+            if frame is None:
+                break
+            if not put_until_stopped(frames_q, frame, stop_event):
+                return
+    except Exception as e:
+        print(f"Capture thread failed: {e}")
+        raise
+    finally:
+        put_until_stopped(frames_q, None, stop_event)
+
+def inference_loop(basketball_model, pose_model, frames_q, render_q, stop_event):
+    """
+    Inference thread: batch up whatever frames are waiting (up to BATCH_SIZE), run both
+    models once per batch and queue (frame, ball_boxes, pose_results) for display.
+    Frames without motion since the last inferred frame skip the models and reuse its detections.
+    A None is queued at the end, even if inference fails, so the display loop knows to finish.
+    """
+    try:
+        # Helper thread for running the two models side by side
+        with ThreadPoolExecutor(max_workers=1) as model_pool:
+            reference_small = None  # Downsampled gray copy of the last inferred frame
+            last_detections = None
+            finished = False
+            while not finished and not stop_event.is_set():
+                try:
+                    frames = [frames_q.get(timeout=0.1)]
+                except queue.Empty:
+                    continue
+                while len(frames) < BATCH_SIZE:
+                    try:
+                        frames.append(frames_q.get_nowait())
+                    except queue.Empty:
+                        break
+                if frames[-1] is None:
+                    finished = True
+                    frames.pop()
                 
-                # Check if this person is holding the basketball
-                is_holding = (i == current_holder_id)
+                # Motion gate: compare each frame against the last one sent to the models
+                needs_inference = []
+                for frame in frames:
+                    source = cv2.UMat(frame) if USE_OPENCL else frame
+                    small = cv2.resize(cv2.cvtColor(source, cv2.COLOR_BGR2GRAY), MOTION_SIZE, interpolation=cv2.INTER_AREA)
+                    moved = reference_small is None or cv2.mean(cv2.absdiff(small, reference_small))[0] >= MOTION_THRESHOLD
+                    if moved:
+                        reference_small = small
+                    needs_inference.append(moved)
                 
-                # Draw keypoints for each person
-                for j, keypoint in enumerate(keypoints):
-                    if keypoint[2] > 0.4:  # Confidence threshold
-                        x, y = int(keypoint[0]), int(keypoint[1])
-                        
-                        # Special highlighting for wrists (keypoints 9 and 10) of current holder
-                        if j == 9:  # Left wrist
-                            if is_holding:
-                                color = (0, 255, 255)  # Bright yellow for current holder
-                                radius = 12
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                                cv2.putText(frame, "L Hand", (x + 5, y - 5), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                            else:
-                                color = (0, 255, 255)  # Yellow for others
-                                radius = 8
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                        elif j == 10:  # Right wrist
-                            if is_holding:
-                                color = (255, 0, 255)  # Bright magenta for current holder
-                                radius = 12
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                                cv2.putText(frame, "R Hand", (x + 5, y - 5), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                            else:
-                                color = (255, 0, 255)  # Magenta for others
-                                radius = 8
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                        elif j in [13, 14]:  # Knees - highlight for step tracking
-                            if is_holding:
-                                color = (255, 255, 0)  # Bright cyan for current holder
-                                radius = 10
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                                cv2.putText(frame, "Knee", (x + 5, y - 5), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
-                            else:
-                                color = (255, 255, 0)  # Cyan for others
-                                radius = 6
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                        elif j in [11, 12]:  # Hips - highlight for step tracking
-                            if is_holding:
-                                color = (255, 255, 0)  # Bright cyan for current holder
-                                radius = 10
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                                cv2.putText(frame, "Hip", (x + 5, y - 5), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
-                            else:
-                                color = (255, 255, 0)  # Cyan for others
-                                radius = 6
-                                cv2.circle(frame, (x, y), radius, color, -1)
-                        else:
-                            # Different colors for different body parts
-                            if j < 5:  # Head and torso
-                                color = (255, 255, 0)  # Cyan
-                            elif j < 11:  # Arms
-                                color = (0, 255, 255)  # Yellow
-                            elif j < 17:  # Legs
-                                color = (255, 0, 255)  # Magenta
-                            else:  # Hands and feet
-                                color = (0, 255, 0)  # Green
-                            
-                            # Make keypoints larger for the current holder
-                            radius = 6 if is_holding else 4
-                            cv2.circle(frame, (x, y), radius, color, -1)
+                moving_frames = [frame for frame, moved in zip(frames, needs_inference) if moved]
+                if moving_frames:
+                    # Detect basketballs and poses for the whole batch
+                    # The two models share no weights, so overlap them: the ball detector runs on a
+                    # helper thread while the pose model runs here (inference releases the GIL)
+                    basketball_future = model_pool.submit(run_model, basketball_model, moving_frames, BALL_IMGSZ,
+                                                          conf=BALL_CONF, max_det=MAX_DETECTIONS)
+                    pose_batch = run_model(pose_model, moving_frames, POSE_IMGSZ, max_det=MAX_DETECTIONS)
+                    basketball_batch = basketball_future.result()
                 
-                # Draw player ID and status near the person's center
-                if current_person_center and is_holding:
-                    center_x, center_y = int(current_person_center[0]), int(current_person_center[1])
-                    cv2.putText(frame, f"Player {i} - HOLDING", (center_x - 50, center_y - 50), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                elif current_person_center:
-                    center_x, center_y = int(current_person_center[0]), int(current_person_center[1])
-                    cv2.putText(frame, f"Player {i}", (center_x - 30, center_y - 50), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # Draw bounding boxes for basketballs (green)
-        for (x1, y1, x2, y2, confidence) in ball_boxes:
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)  # Green for basketballs
-            cv2.putText(frame, f"Basketball ({confidence:.2f})", (x1, y1 - 10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        # Display travel status prominently
-        if traveling_detected:
-            cv2.putText(frame, "TRAVELING DETECTED!", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 3)
-            cv2.putText(frame, "3+ STEPS WITHOUT DRIBBLING", (10, 70), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-        
-        # Display holding status
-        if current_holder_id is not None:
-            cv2.putText(frame, f"Player {current_holder_id} is HOLDING the ball", (10, 110), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-            cv2.putText(frame, f"Holding for {holding_frames} frames", (10, 140), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                k = 0
+                for frame, moved in zip(frames, needs_inference):
+                    if moved:
+                        ball_boxes = extract_ball_boxes(basketball_batch[k:k + 1], basketball_model.names)
+                        last_detections = (ball_boxes, pose_batch[k:k + 1])
+                        k += 1
+                    if not put_until_stopped(render_q, (frame,) + last_detections, stop_event):
+                        return
+    except Exception as e:
+        print(f"Inference thread failed: {e}")
+        raise
+    finally:
+        # Always tell the display loop to finish, otherwise it would wait on render_q forever
+        put_until_stopped(render_q, None, stop_event)
+
+def main():
+    cv2.setNumThreads(OPENCV_THREADS)
+    cv2.ocl.setUseOpenCL(USE_OPENCL)
+    
+    # Open the webcam
+    print("Attempting to open webcam...")
+    cap = cv2.VideoCapture(0, cv2.CAP_AVFOUNDATION)
+    
+    if not cap.isOpened():
+        print("Error: Could not open video stream.")
+        sys.exit()
+    
+    print("Webcam opened successfully. Now loading YOLO models...")
+    
+    # Load only the pose and basketball models
+    basketball_model = load_model('basketballmodel.pt', task='detect')
+    pose_model = load_model('yolov8s pose.pt', task='pose')
+    
+    # Some capture backends report 0x0 until the first read; fall back to VGA in that case
+    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 480
+    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 640
+    warm_up_models(basketball_model, pose_model, (frame_height, frame_width, 3))
+    
+    print("YOLO models loaded.")
+    print("Basketball detection with travel detection active. Press 'q' to quit.")
+    
+    # Capture, inference and display run on separate threads joined by bounded queues,
+    # so each stage only waits on the slowest one instead of all of them in sequence
+    stop_event = threading.Event()
+    frames_q = queue.Queue(maxsize=BATCH_SIZE)
+    render_q = queue.Queue(maxsize=RENDER_QUEUE_SIZE)
+    
+    capture_thread = threading.Thread(target=capture_loop, args=(cap, frames_q, stop_event), daemon=True)
+    inference_thread = threading.Thread(target=inference_loop,
+                                        args=(basketball_model, pose_model, frames_q, render_q, stop_event),
+                                        daemon=True)
+    capture_thread.start()
+    inference_thread.start()
+    
+    state = TrackingState()
+    
+    while True:
+        item = render_q.get()
+        if item is None:
+            break
         
-        # Display ball position and movement info
-        if current_holder_id is not None and holding_frames > 5 and ball_positions and knee_positions:
-            if ball_positions[-1] is not None and knee_positions[-1] is not None:
-                ball_y = ball_positions[-1][1]
-                knee_y = knee_positions[-1][1]
-                ball_above_knees = ball_y < knee_y
-                
-                # Calculate horizontal movement
-                if len(ball_positions) >= 10:
-                    recent_x_positions = [pos[0] for pos in ball_positions[-10:] if pos is not None]
-                    if recent_x_positions:
-                        horizontal_movement = max(recent_x_positions) - min(recent_x_positions)
-                        cv2.putText(frame, f"Ball above knees: {'YES' if ball_above_knees else 'NO'}", (10, 170), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                        cv2.putText(frame, f"Horizontal movement: {horizontal_movement:.1f}px", (10, 200), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        frame, ball_boxes, pose_results = item
+        process_frame(frame, ball_boxes, pose_results, state, time.monotonic())
         
         # Display the frame
         cv2.imshow("Basketball Detection with Travel Detection", frame)
@@ -444,6 +644,10 @@ def main():
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
     
+    stop_event.set()
+    capture_thread.join()
+    inference_thread.join()
+    
     # Release the video capture object and close the display window
     print("Releasing resources.")
     cap.release()
@@ -15,7 +15,15 @@ class BallTracker:
     in batches, and refine tracking results through filtering and interpolation.
     """
     def __init__(self, model_path):
-        self.model = YOLO(model_path) 
+        self.model_path = model_path
+        self._model = None
+
+    @property
+    def model(self):
+        """YOLO model, loaded on first use so runs served from the stub never load the weights."""
+        if self._model is None:
+            self._model = YOLO(self.model_path)
+        return self._model
 
     def detect_frames(self, frames):
         """
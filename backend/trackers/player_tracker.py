@@ -18,9 +18,17 @@ class PlayerTracker:
         Args:
             model_path (str): Path to the YOLO model weights.
         """
-        self.model = YOLO(model_path) 
+        self.model_path = model_path
+        self._model = None
         self.tracker = sv.ByteTrack()
 
+    @property
+    def model(self):
+        """YOLO model, loaded on first use so runs served from the stub never load the weights."""
+        if self._model is None:
+            self._model = YOLO(self.model_path)
+        return self._model
+
     def detect_frames(self, frames):
         """
         Detect players in a sequence of frames using optimized batch processing.
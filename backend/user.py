@@ -1,48 +1,230 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
-from mongodb import create_user, get_user
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from mongodb import create_user, get_user, cache_user
 import jwt
-import datetime
 import os
 from functools import wraps
 import subprocess
 import sys
 import signal
-import psutil
 import atexit
 import time
 import uuid
-import json
-from werkzeug.utils import secure_filename
+import secrets
+import orjson
+import threading
+import logging
+import hashlib
+from dataclasses import dataclass, field
+from typing import Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache, TTLCache
+from werkzeug.utils import secure_filename, safe_join
+from werkzeug.exceptions import NotFound
+from urllib.parse import quote
+import mimetypes
 import cv2
 
+# Configured here rather than under __main__ so the logs also show when the app is imported
+# (start_backend.py, WSGI servers); a no-op if the host already set up logging.
+# Set LOG_LEVEL=WARNING in production to skip the per-request info logs
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
+
+try:
+    # Run the analysis pipeline in-process when its dependencies are importable
+    from main import analyze
+except Exception as e:
+    # Any failure while importing the pipeline (missing ML packages, bad config, ...) falls back to the subprocess
+    analyze = None
+    logging.getLogger(__name__).warning("Analysis will run in a subprocess, importing main failed: %r", e)
+
+def orjson_dumps(obj):
+    """Serialize to JSON bytes, falling back to str() for types orjson doesn't know (e.g. ObjectId)"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson for faster response serialization"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson_dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip in dumps()
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson_dumps(obj), mimetype='application/json')
+
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-production')
-CORS(app, origins=["http://localhost:5173", "http://127.0.0.1:5173"], supports_credentials=True)
+# Reject oversized uploads up front (Flask responds with 413)
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', '500')) * 1024 * 1024
+# Let browsers cache preflight responses for a day instead of repeating OPTIONS requests
+CORS(app, origins=["http://localhost:5173", "http://127.0.0.1:5173"], supports_credentials=True,
+     methods=['GET', 'POST', 'DELETE', 'OPTIONS'], max_age=86400)
+# Let nginx/Apache stream video files via X-Sendfile when deployed behind one
+app.use_x_sendfile = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+# Or hand video files to nginx via X-Accel-Redirect; the prefix must be an internal
+# location aliased to the backend directory
+X_ACCEL_REDIRECT_PREFIX = os.getenv('X_ACCEL_REDIRECT_PREFIX')
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # JWT token expiration time (24 hours)
 JWT_EXPIRATION_HOURS = 24
 
+# Chunk size used when writing uploaded videos to disk
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+ALLOWED_EXTENSIONS = frozenset({'mp4', 'avi', 'mov', 'mkv'})
+
+def load_jwt_keys():
+    """Load the Ed25519 key pair used for EdDSA tokens, if one is configured"""
+    private_key_path = os.getenv('JWT_PRIVATE_KEY_PATH')
+    public_key_path = os.getenv('JWT_PUBLIC_KEY_PATH')
+    if not private_key_path and not public_key_path:
+        return None, None
+    
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+    
+    if private_key_path:
+        with open(private_key_path, 'rb') as f:
+            private_key = load_pem_private_key(f.read(), password=None)
+        return private_key, private_key.public_key()
+    
+    # Verification-only server: it can check tokens but not issue them
+    with open(public_key_path, 'rb') as f:
+        return None, load_pem_public_key(f.read())
+
+# Parsed once at startup; without a private key tokens are signed with HS256
+JWT_PRIVATE_KEY, JWT_PUBLIC_KEY = load_jwt_keys()
+# Reused for every encode/decode so the HS256 secret is only encoded to bytes once
+_jwt_codec = jwt.PyJWT()
+_jwt_secret = app.config['SECRET_KEY'].encode('utf-8')
+
+# Recently verified tokens -> (payload, user); entries are also checked against 'exp' on use
+_jwt_cache = TTLCache(maxsize=10000, ttl=60)
+_jwt_cache_lock = threading.Lock()
+
 # Global variables for analysis data
-opencv_process = None
-analysis_sessions = {}  # Store analysis session data
+@dataclass
+class AnalysisProcess:
+    """The desktop analysis subprocess; lock guards every change to proc"""
+    proc: Optional[subprocess.Popen] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # (polled process, time of poll, poll result), replaced as one tuple so readers never see a mix
+    last_poll: tuple = (None, 0.0, None)
+    
+    def set(self, proc):
+        self.proc = proc
+        self.last_poll = (None, 0.0, None)
+    
+    def status_poll(self, proc, max_age=0.2):
+        """
+        proc.poll(), reusing a result younger than max_age seconds so status polling doesn't hit waitpid each time.
+        The cached result is only reused for the process it came from.
+        """
+        polled_proc, polled_at, result = self.last_poll
+        now = time.monotonic()
+        if polled_proc is proc and (result is not None or now - polled_at < max_age):
+            return result
+        result = proc.poll()
+        self.last_poll = (proc, now, result)
+        return result
+
+analysis_process = AnalysisProcess()
+analysis_sessions = LRUCache(maxsize=1024)  # Store analysis session data (least recently used evicted first)
+_sessions_lock = threading.RLock()
 current_session_id = None
 
+# Background workers for deferred analysis jobs, so requests don't block on them
+analysis_executor = ThreadPoolExecutor(max_workers=2)
+
 def generate_token(user_id, email):
     """Generate JWT token for user"""
+    now = int(time.time())
     payload = {
         'user_id': str(user_id),
         'email': email,
-        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=JWT_EXPIRATION_HOURS),
-        'iat': datetime.datetime.utcnow()
+        'exp': now + JWT_EXPIRATION_HOURS * 3600,
+        'iat': now
     }
-    return jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')
+    if JWT_PRIVATE_KEY is not None:
+        return _jwt_codec.encode(payload, JWT_PRIVATE_KEY, algorithm='EdDSA')
+    return _jwt_codec.encode(payload, _jwt_secret, algorithm='HS256')
+
+def decode_token(token):
+    """Verify a JWT signed with EdDSA, or with the legacy HS256 secret during migration"""
+    if JWT_PUBLIC_KEY is not None and jwt.get_unverified_header(token).get('alg') == 'EdDSA':
+        return _jwt_codec.decode(token, JWT_PUBLIC_KEY, algorithms=['EdDSA'])
+    return _jwt_codec.decode(token, _jwt_secret, algorithms=['HS256'])
+
+# argon2id for new hashes; werkzeug pbkdf2 hashes are still accepted and upgraded on login
+password_hasher = PasswordHasher()
+
+def hash_password(password):
+    return password_hasher.hash(password)
+
+def verify_password(stored_hash, password):
+    """
+    Check a password against a stored hash.
+    
+    Returns (valid, needs_rehash); needs_rehash is True for legacy werkzeug
+    hashes and argon2 hashes created with outdated parameters.
+    """
+    if not stored_hash.startswith('$argon2'):
+        valid = check_password_hash(stored_hash, password)
+        return valid, valid
+    try:
+        password_hasher.verify(stored_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False, False
+    return True, password_hasher.check_needs_rehash(stored_hash)
+
+def _token_cache_key(token):
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+
+def authenticate_token(token):
+    """
+    Verify a token and load its user, returning (payload, user).
+    
+    Successful verifications are cached briefly so repeat requests with the same
+    token skip the signature check and the database lookup. Raises the usual
+    jwt exceptions for invalid or expired tokens.
+    """
+    key = _token_cache_key(token)
+    with _jwt_cache_lock:
+        cached = _jwt_cache.get(key)
+    if cached is not None and cached[0]['exp'] > time.time():
+        return cached
+    
+    payload = decode_token(token)
+    user = get_user(payload['email'])
+    if user:
+        with _jwt_cache_lock:
+            _jwt_cache[key] = (payload, user)
+    return payload, user
+
+def invalidate_token(token):
+    """Drop a token from the verification cache"""
+    with _jwt_cache_lock:
+        _jwt_cache.pop(_token_cache_key(token), None)
 
 def token_required(f):
     """Decorator to require JWT token for protected routes"""
     @wraps(f)
     def decorated(*args, **kwargs):
+        # Token already validated earlier in this request (e.g. chained decorators)
+        if getattr(g, 'current_user', None):
+            return f(g.current_user, *args, **kwargs)
+        
         token = None
         
         # Get token from Authorization header
@@ -58,8 +240,7 @@ def token_required(f):
         
         try:
             # Decode token
-            payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user = get_user(payload['email'])
+            payload, current_user = authenticate_token(token)
             
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
@@ -69,6 +250,11 @@ def token_required(f):
         except jwt.InvalidTokenError:
             return jsonify({'error': 'Invalid token'}), 401
         
+        # Cache the validated identity for the rest of this request
+        g.current_user = current_user
+        g.jwt_payload = payload
+        g.jwt_token = token
+        
         return f(current_user, *args, **kwargs)
     
     return decorated
@@ -79,11 +265,7 @@ def health_check():
 
 @app.route("/signup", methods=["POST"])
 def signup():
-    print("Signup endpoint called")
-    print("Request headers:", dict(request.headers))
-    
     data = request.get_json()
-    print("Request data:", data)
 
     first_name = data.get("firstName")
     last_name = data.get("lastName")
@@ -92,18 +274,28 @@ def signup():
 
     if not all([first_name, last_name, email, password]):
         return jsonify({"error": "Missing required fields"}), 400
+    
+    # Never log the request body: it contains the plaintext password
+    logger.info("Signup requested for email=%s", email)
 
     if get_user(email):
         return jsonify({"error": "User already exists"}), 409
 
-    hashed_password = generate_password_hash(password)
+    hashed_password = hash_password(password)
 
     user_id = create_user(first_name, last_name, email, hashed_password)
     if user_id:
-        print("User created successfully:", user_id)
+        logger.info("User created successfully: %s", user_id)
+        cache_user(email, {
+            "_id": user_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email,
+            "password": hashed_password
+        })
         return jsonify({"message": "User created successfully", "user_id": str(user_id)}), 201
     else:
-        print("Failed to create user")
+        logger.warning("Failed to create user for email=%s", email)
         return jsonify({"error": "Failed to create user"}), 500
 
 @app.route("/login", methods=["POST"])
@@ -130,14 +322,19 @@ def login():
         }
     }), 200
     # --- END DEMO MODE ---
-    # Original logic below (commented out):
+    # Original logic below (commented out; restoring it also needs update_user imported from mongodb):
     # email = data.get("email")
     # password = data.get("password")
     # if not email or not password:
     #     return jsonify({"error": "Email and password are required"}), 400
     # user = get_user(email)
-    # if not user or not check_password_hash(user["password"], password):
+    # if not user:
     #     return jsonify({"error": "Invalid email or password"}), 401
+    # valid, needs_rehash = verify_password(user["password"], password)
+    # if not valid:
+    #     return jsonify({"error": "Invalid email or password"}), 401
+    # if needs_rehash:
+    #     update_user(email, {"password": hash_password(password)})
     # token = generate_token(user["_id"], user["email"])
     # return jsonify({
     #     "message": f"Welcome, {user['first_name']}!",
@@ -154,7 +351,8 @@ def login():
 @token_required
 def logout(current_user):
     """Logout endpoint - client should discard the token"""
-    print("Logout endpoint called for user:", current_user["email"])
+    logger.debug("Logout for user=%s", current_user["email"])
+    invalidate_token(g.jwt_token)
     
     # In a stateless JWT system, the client is responsible for discarding the token
     # We could implement a blacklist here if needed for additional security
@@ -183,8 +381,7 @@ def verify_token():
         return jsonify({"error": "Token is required"}), 400
     
     try:
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user = get_user(payload['email'])
+        payload, user = authenticate_token(token)
         
         if not user:
             return jsonify({"error": "User not found"}), 401
@@ -204,21 +401,37 @@ def verify_token():
     except jwt.InvalidTokenError:
         return jsonify({"valid": False, "error": "Invalid token"}), 401
 
+def send_video(directory, filename, private=False):
+    """
+    Send a video file, letting nginx stream it when X-Accel-Redirect is configured.
+    Videos behind authentication are sent with private=True so shared caches never store them.
+    """
+    if not X_ACCEL_REDIRECT_PREFIX:
+        response = send_from_directory(directory, filename, conditional=True, max_age=3600)
+    else:
+        path = safe_join(directory, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+        relative_path = os.path.relpath(os.path.abspath(path), BACKEND_DIR).replace(os.sep, '/')
+        response = app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = X_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(relative_path)
+    
+    if private:
+        response.cache_control.public = False
+        response.cache_control.private = True
+    return response
+
 @app.route("/api/video/<filename>", methods=["GET"])
 def serve_video(filename):
     """Serve video files from the backend directory"""
     try:
-        # Get the directory where this script is located
-        backend_dir = os.path.dirname(os.path.abspath(__file__))
-        return send_from_directory(backend_dir, filename)
+        return send_video(BACKEND_DIR, filename)
     except FileNotFoundError:
         return jsonify({"error": "Video file not found"}), 404
 
 @app.route('/api/launch-desktop-app', methods=['POST'])
 def launch_desktop_app():
     """Launch the person_ball_detection.py desktop app with backend webcam"""
-    global opencv_process
-    
     try:
         # Path to the person_ball_detection.py script
         script_path = os.path.join(os.path.dirname(__file__), 'opencv-test', 'person_ball_detection.py')
@@ -227,27 +440,32 @@ def launch_desktop_app():
         if not os.path.exists(script_path):
             return jsonify({'error': 'person_ball_detection.py not found'}), 404
         
-        # Check if process is already running
-        if opencv_process is not None and opencv_process.poll() is None:
-            return jsonify({'error': 'Analysis is already running'}), 400
+        # Check-and-launch must be atomic so concurrent requests can't start two processes
+        with analysis_process.lock:
+            # Check if process is already running
+            if analysis_process.proc is not None and analysis_process.proc.poll() is None:
+                return jsonify({'error': 'Analysis is already running'}), 400
         
-        # Create a new webcam session
-        session_id = create_session('webcam')
+            # Create a new webcam session
+            session_id = create_session('webcam')
         
-        # Launch the Python script with backend webcam
-        # Use subprocess.Popen to run it in the background
-        opencv_process = subprocess.Popen([sys.executable, script_path], 
-                                        cwd=os.path.dirname(script_path),
-                                        stdout=subprocess.PIPE,
-                                        stderr=subprocess.PIPE)
+            # Launch the Python script with backend webcam
+            # Use subprocess.Popen to run it in the background
+            # Start it in its own session so the whole process group can be killed at once
+            proc = subprocess.Popen([sys.executable, script_path], 
+                                    cwd=os.path.dirname(script_path),
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE,
+                                    start_new_session=True)
+            analysis_process.set(proc)
         
-        return jsonify({
-            'success': True,
-            'message': 'Basketball analysis launched successfully with backend webcam',
-            'pid': opencv_process.pid,
-            'session_id': session_id,
-            'note': 'The analysis window will open on your desktop. Press q to quit.'
-        })
+            return jsonify({
+                'success': True,
+                'message': 'Basketball analysis launched successfully with backend webcam',
+                'pid': proc.pid,
+                'session_id': session_id,
+                'note': 'The analysis window will open on your desktop. Press q to quit.'
+            })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -255,67 +473,70 @@ def launch_desktop_app():
 @app.route('/api/kill-desktop-app', methods=['POST'])
 def kill_desktop_app():
     """Kill the running person_ball_detection.py process"""
-    global opencv_process, current_session_id
+    global current_session_id
     
     try:
-        if opencv_process is None:
-            return jsonify({'error': 'No analysis process is running'}), 404
+        with analysis_process.lock:
+            opencv_process = analysis_process.proc
+            if opencv_process is None:
+                return jsonify({'error': 'No analysis process is running'}), 404
         
-        # Check if process is still running
-        if opencv_process.poll() is not None:
-            opencv_process = None
-            # Finalize the session
-            if current_session_id and current_session_id in analysis_sessions:
-                analysis_sessions[current_session_id]['status'] = 'completed'
-                analysis_sessions[current_session_id]['duration'] = time.time() - float(current_session_id.split('_')[1])
-            return jsonify({'error': 'Analysis process has already ended'}), 404
-        
-        # Kill the process and its children
-        try:
-            # Get the process and all its children
-            parent = psutil.Process(opencv_process.pid)
-            children = parent.children(recursive=True)
+            # Check if process is still running
+            if opencv_process.poll() is not None:
+                analysis_process.set(None)
+                # Finalize the session
+                with _sessions_lock:
+                    if current_session_id and current_session_id in analysis_sessions:
+                        session = analysis_sessions[current_session_id]
+                        session['status'] = 'completed'
+                        session['duration'] = time.time() - session['started_at']
+                return jsonify({'error': 'Analysis process has already ended'}), 404
+        
+            # Kill the process and its children (they share the process group)
+            try:
+                pgid = os.getpgid(opencv_process.pid)
+                os.killpg(pgid, signal.SIGTERM)
             
-            # Kill children first
-            for child in children:
+                # Wait a bit for graceful termination
                 try:
-                    child.terminate()
-                except psutil.NoSuchProcess:
-                    pass
-            
-            # Kill the parent process
-            parent.terminate()
-            
-            # Wait a bit for graceful termination
-            try:
-                parent.wait(timeout=3)
-            except psutil.TimeoutExpired:
-                # Force kill if it doesn't terminate gracefully
-                parent.kill()
+                    opencv_process.wait(timeout=3)
+                except subprocess.TimeoutExpired:
+                    # Force kill if it doesn't terminate gracefully
+                    os.killpg(pgid, signal.SIGKILL)
+                    opencv_process.wait()
+                else:
+                    # The leader exited; kill any children that ignored SIGTERM
+                    try:
+                        os.killpg(pgid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
             
-            # Finalize the session
-            if current_session_id and current_session_id in analysis_sessions:
-                analysis_sessions[current_session_id]['status'] = 'completed'
-                analysis_sessions[current_session_id]['duration'] = time.time() - float(current_session_id.split('_')[1])
+                # Finalize the session
+                with _sessions_lock:
+                    if current_session_id and current_session_id in analysis_sessions:
+                        session = analysis_sessions[current_session_id]
+                        session['status'] = 'completed'
+                        session['duration'] = time.time() - session['started_at']
             
-            opencv_process = None
+                analysis_process.set(None)
             
-            return jsonify({
-                'success': True,
-                'message': 'Analysis process terminated successfully',
-                'session_id': current_session_id
-            })
+                return jsonify({
+                    'success': True,
+                    'message': 'Analysis process terminated successfully',
+                    'session_id': current_session_id
+                })
             
-        except psutil.NoSuchProcess:
-            opencv_process = None
-            # Finalize the session
-            if current_session_id and current_session_id in analysis_sessions:
-                analysis_sessions[current_session_id]['status'] = 'completed'
-            return jsonify({
-                'success': True,
-                'message': 'Analysis process was already terminated',
-                'session_id': current_session_id
-            })
+            except ProcessLookupError:
+                analysis_process.set(None)
+                # Finalize the session
+                with _sessions_lock:
+                    if current_session_id and current_session_id in analysis_sessions:
+                        analysis_sessions[current_session_id]['status'] = 'completed'
+                return jsonify({
+                    'success': True,
+                    'message': 'Analysis process was already terminated',
+                    'session_id': current_session_id
+                })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -324,9 +545,9 @@ def kill_desktop_app():
 @token_required
 def get_analysis_status(current_user):
     """Get the current status of the analysis process"""
-    global opencv_process
-    
     try:
+        # Only clearing the process needs the lock; reads work on a local reference
+        opencv_process = analysis_process.proc
         if opencv_process is None:
             return jsonify({
                 'running': False,
@@ -334,14 +555,16 @@ def get_analysis_status(current_user):
             })
         
         # Check if process is still running
-        if opencv_process.poll() is None:
+        if analysis_process.status_poll(opencv_process) is None:
             return jsonify({
                 'running': True,
                 'pid': opencv_process.pid,
                 'message': 'Analysis is currently running'
             })
         else:
-            opencv_process = None
+            with analysis_process.lock:
+                if analysis_process.proc is opencv_process:
+                    analysis_process.set(None)
             return jsonify({
                 'running': False,
                 'message': 'Analysis process has ended'
@@ -352,31 +575,40 @@ def get_analysis_status(current_user):
 
 def cleanup_process():
     """Clean up the OpenCV process if it's still running"""
-    global opencv_process
-    if opencv_process is not None:
-        try:
-            if opencv_process.poll() is None:  # Process is still running
-                opencv_process.terminate()
-                try:
-                    opencv_process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    opencv_process.kill()
-        except Exception as e:
-            print(f"Error cleaning up process: {e}")
-        finally:
-            opencv_process = None
+    with analysis_process.lock:
+        opencv_process = analysis_process.proc
+        if opencv_process is not None:
+            try:
+                if opencv_process.poll() is None:  # Process is still running
+                    opencv_process.terminate()
+                    try:
+                        opencv_process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        opencv_process.kill()
+            except Exception as e:
+                print(f"Error cleaning up process: {e}")
+            finally:
+                analysis_process.set(None)
 
 # Register cleanup function to run on app shutdown
 atexit.register(cleanup_process)
 
+# Session fields kept for the stats/results endpoints and duration tracking, not part of the raw data dump
+INTERNAL_SESSION_KEYS = ('_formatted_events', 'severity_counts', 'started_at')
+
 @app.route('/api/analysis-data/<session_id>', methods=['GET'])
 def get_analysis_data(session_id):
     """Get analysis data for a specific session"""
     try:
-        if session_id not in analysis_sessions:
+        with _sessions_lock:
+            session_data = analysis_sessions.get(session_id)
+            if session_data is not None:
+                session_data = dict(session_data)
+        if session_data is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        session_data = analysis_sessions[session_id]
+        for key in INTERNAL_SESSION_KEYS:
+            session_data.pop(key, None)
         return jsonify(session_data)
         
     except Exception as e:
@@ -386,38 +618,35 @@ def get_analysis_data(session_id):
 def get_completion_stats(session_id):
     """Get completion statistics for analysis session"""
     try:
-        if session_id not in analysis_sessions:
+        with _sessions_lock:
+            session_data = analysis_sessions.get(session_id)
+            if session_data is not None:
+                session_data = dict(session_data)
+        if session_data is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        session_data = analysis_sessions[session_id]
+        events = session_data.get('events', [])
+        # Severity totals are maintained by update_session_data
+        severity_counts = session_data.get('severity_counts', {})
         
         # Calculate stats based on session type
         if session_data.get('type') == 'webcam':
             # For webcam sessions, use real-time data
-            events = session_data.get('events', [])
             duration = session_data.get('duration', 0)
-            
-            stats = {
-                'events_found': len(events),
-                'duration': format_duration(duration),
-                'violations': len([e for e in events if e.get('severity') == 'error']),
-                'warnings': len([e for e in events if e.get('severity') == 'warning']),
-                'good_plays': len([e for e in events if e.get('severity') == 'info']),
-                'session_type': 'webcam'
-            }
+            session_type = 'webcam'
         else:
             # For uploaded video sessions, use processed data
-            events = session_data.get('events', [])
             duration = session_data.get('video_duration', 0)
-            
-            stats = {
-                'events_found': len(events),
-                'duration': format_duration(duration),
-                'violations': len([e for e in events if e.get('severity') == 'error']),
-                'warnings': len([e for e in events if e.get('severity') == 'warning']),
-                'good_plays': len([e for e in events if e.get('severity') == 'info']),
-                'session_type': 'upload'
-            }
+            session_type = 'upload'
+        
+        stats = {
+            'events_found': len(events),
+            'duration': format_duration(duration),
+            'violations': severity_counts.get('error', 0),
+            'warnings': severity_counts.get('warning', 0),
+            'good_plays': severity_counts.get('info', 0),
+            'session_type': session_type
+        }
         
         return jsonify(stats)
         
@@ -428,22 +657,15 @@ def get_completion_stats(session_id):
 def get_analysis_results(session_id):
     """Get detailed analysis results for a session"""
     try:
-        if session_id not in analysis_sessions:
+        with _sessions_lock:
+            session_data = analysis_sessions.get(session_id)
+            if session_data is not None:
+                session_data = dict(session_data)
+        if session_data is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        session_data = analysis_sessions[session_id]
-        
-        # Format events for frontend
-        events = []
-        for i, event in enumerate(session_data.get('events', [])):
-            events.append({
-                'id': str(i + 1),
-                'timestamp': event.get('timestamp', 0),
-                'type': event.get('type', 'Event'),
-                'title': event.get('title', event.get('description', 'Unknown Event')),
-                'description': event.get('description', ''),
-                'severity': event.get('severity', 'info')
-            })
+        # Events are formatted for the frontend when they are stored
+        events = session_data.get('_formatted_events', [])
         
         results = {
             'events': events,
@@ -478,30 +700,54 @@ def format_duration(seconds):
     secs = int(seconds % 60)
     return f"{mins:02d}:{secs:02d}"
 
+def format_event(index, event):
+    """Format a session event into the shape the frontend expects"""
+    return {
+        'id': str(index + 1),
+        'timestamp': event.get('timestamp', 0),
+        'type': event.get('type', 'Event'),
+        'title': event.get('title', event.get('description', 'Unknown Event')),
+        'description': event.get('description', ''),
+        'severity': event.get('severity', 'info')
+    }
+
 def create_session(session_type, video_source=None):
     """Create a new analysis session"""
     global current_session_id
     
-    session_id = f"session_{int(time.time())}"
+    # Random IDs can't collide when two sessions start in the same second
+    session_id = secrets.token_hex(8)
     current_session_id = session_id
     
-    analysis_sessions[session_id] = {
-        'id': session_id,
-        'type': session_type,
-        'video_source': video_source,
-        'events': [],
-        'duration': 0,
-        'video_duration': 0,
-        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-        'status': 'active'
-    }
+    with _sessions_lock:
+        analysis_sessions[session_id] = {
+            'id': session_id,
+            'type': session_type,
+            'video_source': video_source,
+            'events': [],
+            'severity_counts': {},
+            '_formatted_events': [],
+            'duration': 0,
+            'video_duration': 0,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'started_at': time.time(),
+            'status': 'active'
+        }
     
     return session_id
 
 def update_session_data(session_id, data):
     """Update session data with new analysis results"""
-    if session_id in analysis_sessions:
-        analysis_sessions[session_id].update(data)
+    if 'events' in data:
+        # Derive the stats totals and frontend projection once here rather than on every GET
+        severity_counts = Counter(e.get('severity') for e in data['events'])
+        severity_counts.pop(None, None)
+        data = dict(data, severity_counts=dict(severity_counts),
+                    _formatted_events=[format_event(i, e) for i, e in enumerate(data['events'])])
+    
+    with _sessions_lock:
+        if session_id in analysis_sessions:
+            analysis_sessions[session_id].update(data)
 
 @app.route('/api/simulate-video-analysis', methods=['POST'])
 def simulate_video_analysis():
@@ -513,9 +759,6 @@ def simulate_video_analysis():
         # Create a new upload session
         session_id = create_session('upload', video_filename)
         
-        # Simulate analysis delay
-        time.sleep(2)
-        
         # Create sample analysis events
         sample_events = [
             {
@@ -576,20 +819,26 @@ def simulate_video_analysis():
             }
         ]
         
-        # Update session with analysis results
-        update_session_data(session_id, {
-            'events': sample_events,
-            'video_duration': 930,  # 15:30 in seconds
-            'status': 'completed'
-        })
+        def complete_analysis():
+            # Simulate analysis delay
+            time.sleep(2)
+            
+            # Update session with analysis results
+            update_session_data(session_id, {
+                'events': sample_events,
+                'video_duration': 930,  # 15:30 in seconds
+                'status': 'completed'
+            })
+        
+        # Finish in the background; clients poll /api/analysis-data/<session_id> until status is 'completed'
+        analysis_executor.submit(complete_analysis)
         
         return jsonify({
             'success': True,
-            'message': 'Video analysis completed successfully',
+            'message': 'Video analysis started',
             'session_id': session_id,
-            'events_found': len(sample_events),
-            'duration': '15:30'
-        })
+            'status': 'pending'
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -628,40 +877,63 @@ def analyze_video(current_user):
         
         filename = secure_filename(video_file.filename)
         input_path = os.path.join(session_folder, filename)
-        video_file.save(input_path)
+        # Copy in 1 MB chunks instead of werkzeug's 16 KB default
+        video_file.save(input_path, buffer_size=UPLOAD_BUFFER_SIZE)
         
         output_video_path = os.path.join(session_folder, 'analyzed_video.mp4')
         events_data_path = os.path.join(session_folder, 'events_data.json')
         
-        cmd = [sys.executable, 'main.py', input_path, '--output_video', output_video_path]
-        if max_frames:
-            cmd.extend(['--max_frames', str(max_frames)])
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())
-        
-        if result.returncode != 0:
-            return jsonify({
-                'error': 'Analysis failed',
-                'stderr': result.stderr,
-                'stdout': result.stdout
-            }), 500
-        
-        # Check if output video was created
-        if not os.path.exists(output_video_path):
-            return jsonify({
-                'error': 'Analysis completed but output video not found',
-                'stdout': result.stdout,
-                'stderr': result.stderr
-            }), 500
-        
-        if not os.path.exists(events_data_path):
-            return jsonify({
-                'error': 'Analysis completed but events data not found',
-                'stdout': result.stdout
-            }), 500
+        if analyze is not None:
+            # In-process run: no interpreter startup or re-import of the ML stack per request
+            try:
+                analyze(input_path, output_video_path, max_frames=max_frames)
+            except Exception as e:
+                return jsonify({
+                    'error': 'Analysis failed',
+                    'stderr': str(e)
+                }), 500
+            
+            # Check if output video was created
+            if not os.path.exists(output_video_path):
+                return jsonify({
+                    'error': 'Analysis completed but output video not found'
+                }), 500
+            
+            if not os.path.exists(events_data_path):
+                return jsonify({
+                    'error': 'Analysis completed but events data not found'
+                }), 500
+        else:
+            cmd = [sys.executable, 'main.py', input_path, '--output_video', output_video_path]
+            if max_frames:
+                cmd.extend(['--max_frames', str(max_frames)])
+            
+            result = subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())
+            
+            if result.returncode != 0:
+                return jsonify({
+                    'error': 'Analysis failed',
+                    'stderr': result.stderr,
+                    'stdout': result.stdout
+                }), 500
+            
+            # Check if output video was created
+            if not os.path.exists(output_video_path):
+                return jsonify({
+                    'error': 'Analysis completed but output video not found',
+                    'stdout': result.stdout,
+                    'stderr': result.stderr
+                }), 500
+            
+            if not os.path.exists(events_data_path):
+                return jsonify({
+                    'error': 'Analysis completed but events data not found',
+                    'stdout': result.stdout
+                }), 500
         
-        with open(events_data_path, 'r') as f:
-            events_data = json.load(f)
+        # Both paths respond with the saved events file, so the response has the same shape either way
+        with open(events_data_path, 'rb') as f:
+            events_data = orjson.loads(f.read())
         
         # Calculate actual video duration from the processed video
         video_duration = get_video_duration(output_video_path)
@@ -722,8 +994,7 @@ def serve_processed_video(session_id, filename):
     
     try:
         # Verify token
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user = get_user(payload['email'])
+        payload, user = authenticate_token(token)
         if not user:
             return jsonify({'error': 'Invalid token'}), 401
     except jwt.ExpiredSignatureError:
@@ -738,7 +1009,7 @@ def serve_processed_video(session_id, filename):
         return jsonify({'error': 'Video file not found'}), 404
     
     # Add CORS headers for video streaming
-    response = send_from_directory(video_directory, filename)
+    response = send_video(video_directory, filename, private=True)
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
     response.headers['Access-Control-Allow-Headers'] = 'Authorization, Content-Type'
@@ -752,13 +1023,17 @@ def list_sessions(current_user):
     try:
         sessions = []
         if os.path.exists('output_videos'):
-            for session_id in os.listdir('output_videos'):
-                session_path = os.path.join('output_videos', session_id)
-                if os.path.isdir(session_path):
-                    video_exists = os.path.exists(os.path.join(session_path, 'analyzed_video.mp4'))
-                    events_exists = os.path.exists(os.path.join(session_path, 'events_data.json'))
+            # scandir reuses the directory entry type info, avoiding a stat per file
+            with os.scandir('output_videos') as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    
+                    with os.scandir(entry.path) as session_entries:
+                        names = {e.name for e in session_entries}
                     
-                    if video_exists and events_exists:
+                    if 'analyzed_video.mp4' in names and 'events_data.json' in names:
+                        session_id = entry.name
                         sessions.append({
                             'session_id': session_id,
                             'video_url': f'/processed_video/{session_id}/analyzed_video.mp4',
@@ -802,8 +1077,7 @@ def get_video_duration(video_path):
 
 def allowed_file(filename):
     """Check if the file has an allowed extension."""
-    ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return os.path.splitext(filename)[1][1:].lower() in ALLOWED_EXTENSIONS
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
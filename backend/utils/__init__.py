@@ -1,3 +1,3 @@
-from .video_utils import read_video, save_video
+from .video_utils import read_video, iter_frames, save_video
 from .bbox_utils import get_center_of_bbox, get_bbox_width, measure_distance,measure_xy_distance,get_foot_position
 from .stubs_utils import save_stub,read_stub
\ No newline at end of file
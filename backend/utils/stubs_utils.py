@@ -3,27 +3,82 @@ A module for caching and retrieving computational results to disk.
 
 This module provides utility functions to save and load intermediate processing results,
 which helps avoid redundant computations and speeds up development iterations.
+
+Stub files are not plain pickles: save_stub writes a small container (magic header,
+length fields, the pickle stream and its out-of-band buffers). Always load them with
+read_stub rather than pickle.load; read_stub still accepts older plain-pickle stubs.
 """
 
 import os 
 import pickle
+import struct
+import zlib
+
+# Stubs written by save_stub start with one of these headers; older stubs are plain pickles
+STUB_MAGIC = b'CVSTUB5\n'
+# Same layout, but the in-band pickle stream is zlib-compressed
+STUB_MAGIC_COMPRESSED = b'CVSTUBZ\n'
+# In-band pickle streams larger than this are compressed before writing
+COMPRESS_THRESHOLD = 10 * 1024 * 1024
+_LENGTH = struct.Struct('<Q')
 
 def save_stub(stub_path,object):
     """
     Save a Python object to disk at the specified path.
 
-    Creates necessary directories if they don't exist and serializes the object using pickle.
+    Creates necessary directories if they don't exist and serializes the object using
+    the highest pickle protocol. NumPy array data is taken out-of-band and written
+    directly to the file after the pickle stream instead of being copied into it; a
+    large pickle stream (e.g. nested track dicts) is compressed with fast zlib.
 
     Args:
         stub_path (str): File path where the object should be saved.
         object: Any Python object that can be pickled.
     """
-    if not os.path.exists(os.path.dirname(stub_path)):
-        os.makedirs(os.path.dirname(stub_path))
+    if stub_path is None:
+        return
+
+    os.makedirs(os.path.dirname(stub_path) or '.', exist_ok=True)
+
+    buffers = []
+    data = pickle.dumps(object, protocol=pickle.HIGHEST_PROTOCOL, buffer_callback=buffers.append)
+    magic = STUB_MAGIC
+    if len(data) > COMPRESS_THRESHOLD:
+        data = zlib.compress(data, 1)
+        magic = STUB_MAGIC_COMPRESSED
+    with open(stub_path,'wb') as f:
+        f.write(magic)
+        f.write(_LENGTH.pack(len(buffers)))
+        f.write(_LENGTH.pack(len(data)))
+        f.write(data)
+        for buffer in buffers:
+            raw = buffer.raw()
+            f.write(_LENGTH.pack(raw.nbytes))
+            f.write(raw)
+
+def _load_stub(f):
+    """Load a stub written by save_stub, or a legacy plain pickle."""
+    magic = f.read(len(STUB_MAGIC))
+    if magic not in (STUB_MAGIC, STUB_MAGIC_COMPRESSED):
+        f.seek(0)
+        return pickle.load(f)
+
+    def read_exact(size):
+        data = bytearray(size)
+        if f.readinto(data) != size:
+            raise EOFError("Truncated stub file")
+        return data
 
-    if stub_path is not None:
-        with open(stub_path,'wb') as f:
-            pickle.dump(object,f)
+    num_buffers, = _LENGTH.unpack(read_exact(_LENGTH.size))
+    data_len, = _LENGTH.unpack(read_exact(_LENGTH.size))
+    data = read_exact(data_len)
+    if magic == STUB_MAGIC_COMPRESSED:
+        data = zlib.decompress(data)
+    buffers = []
+    for _ in range(num_buffers):
+        size, = _LENGTH.unpack(read_exact(_LENGTH.size))
+        buffers.append(read_exact(size))
+    return pickle.loads(data, buffers=buffers)
 
 def read_stub(read_from_stub,stub_path):
     """
@@ -39,9 +94,9 @@ def read_stub(read_from_stub,stub_path):
     if read_from_stub and stub_path is not None and os.path.exists(stub_path):
         try:
             with open(stub_path,'rb') as f:
-                object = pickle.load(f)
+                object = _load_stub(f)
                 return object
-        except (ModuleNotFoundError, ImportError, ValueError, EOFError) as e:
+        except (ModuleNotFoundError, ImportError, ValueError, EOFError, zlib.error) as e:
             # Handle numpy version incompatibilities and other pickle errors
             print(f"Warning: Could not load stub from {stub_path}: {e}")
             print("This usually happens due to numpy version incompatibility.")
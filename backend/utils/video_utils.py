@@ -6,12 +6,46 @@ processed frames back to video files, with support for common video formats.
 """
 
 import cv2
+import numpy as np
 import os
 
+try:
+    import av
+except ImportError:
+    av = None
+
+# Hardware H.264 encoders tried in order before falling back to OpenCV
+HARDWARE_ENCODERS = ('h264_nvenc', 'h264_videotoolbox', 'h264_qsv')
+
+def iter_frames(video_path):
+    """
+    Yield frames from a video file one at a time.
+
+    Args:
+        video_path (str): Path to the input video file.
+
+    Yields:
+        numpy.ndarray: The next decoded BGR frame.
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
 def read_video(video_path):
     """
     Read all frames and the FPS from a video file.
 
+    Frames are decoded into a single preallocated (N, H, W, 3) uint8 buffer sized
+    from the container metadata; the returned list holds views into that buffer.
+    If the reported frame count is wrong, extra frames are appended and unused
+    slots are dropped.
+
     Args:
         video_path (str): Path to the input video file.
 
@@ -19,32 +53,70 @@ def read_video(video_path):
         tuple: A tuple containing (list of frames, video FPS).
     """
     cap = cv2.VideoCapture(video_path)
-    frames = []
     fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    buffer = np.empty((frame_count, height, width, 3), dtype=np.uint8)
+
+    frames = []
+    num_read = 0
     while True:
-        ret, frame = cap.read()
+        if num_read < frame_count:
+            # Decode straight into the preallocated slot
+            slot = buffer[num_read]
+            ret, frame = cap.read(slot)
+            if ret and not np.may_share_memory(frame, slot):
+                slot[...] = frame
+                frame = slot
+        else:
+            ret, frame = cap.read()
         if not ret:
             break
         frames.append(frame)
+        num_read += 1
     cap.release()
     return frames, fps
 
-def save_video(ouput_video_frames,output_video_path):
+def _write_video_av(frames, output_video_path, fps, codec_name):
+    """Encode frames with a PyAV encoder, raising if the encoder cannot be used."""
+    height, width = frames[0].shape[:2]
+    with av.open(output_video_path, 'w') as container:
+        stream = container.add_stream(codec_name, rate=fps)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = 'yuv420p'
+        for frame in frames:
+            container.mux(stream.encode(av.VideoFrame.from_ndarray(frame, format='bgr24')))
+        container.mux(stream.encode())
+
+def save_video(ouput_video_frames,output_video_path,fps=24):
     """
     Save a sequence of frames as a video file.
 
-    Creates necessary directories if they don't exist and writes frames using XVID codec.
+    Creates necessary directories if they don't exist. Frames are encoded with a hardware
+    H.264 encoder through PyAV when one is available, otherwise with OpenCV's avc1 writer.
 
     Args:
-        ouput_video_frames (list): List of frames to save.
+        ouput_video_frames (list or numpy.ndarray): List of frames or an (N, H, W, 3) array to save.
         output_video_path (str): Path where the video should be saved.
+        fps (int): Frame rate of the output video.
     """
     # If folder doesn't exist, create it
-    if not os.path.exists(os.path.dirname(output_video_path)):
-        os.makedirs(os.path.dirname(output_video_path))
+    os.makedirs(os.path.dirname(output_video_path) or '.', exist_ok=True)
+
+    if av is not None:
+        for codec_name in HARDWARE_ENCODERS:
+            if codec_name not in av.codecs_available:
+                continue
+            try:
+                _write_video_av(ouput_video_frames, output_video_path, fps, codec_name)
+                return
+            except Exception as e:
+                print(f"Encoder {codec_name} unavailable, trying next: {e}")
 
     fourcc = cv2.VideoWriter_fourcc(*'avc1')
-    out = cv2.VideoWriter(output_video_path, fourcc, 24, (ouput_video_frames[0].shape[1], ouput_video_frames[0].shape[0]))
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, (ouput_video_frames[0].shape[1], ouput_video_frames[0].shape[0]))
     for frame in ouput_video_frames:
         out.write(frame)
-    out.release()
\ No newline at end of file
+    out.release()
@@ -0,0 +1,264 @@
+"""
+A module containing the compiled per-frame loop used for violation detection.
+
+The functions here operate only on NumPy arrays so they can be compiled with Numba.
+When Numba is not installed they run as plain Python with identical results.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback no-op decorator used when Numba is unavailable."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+# Player action codes stored in the per-player action array
+NO_BALL = 0
+HOLDING = 1
+TRANSIENT = 2
+
+# Below this many frames the parallel kernel's thread start-up costs more than it saves
+PARALLEL_MIN_FRAMES = 5000
+
+@njit(cache=True)
+def is_holding(ball_xy, frame_num, hold_len, hold_thr_sq):
+    """
+    Check whether the ball stayed within a small radius over the last hold_len frames.
+
+    Args:
+        ball_xy (np.ndarray): Ball centers of shape (N, 2), NaN where the ball is missing.
+        frame_num (int): Index of the current frame.
+        hold_len (int): Number of frames the ball must be stationary.
+        hold_thr_sq (float): Squared maximum distance (pixels) from the first position in the window.
+
+    Returns:
+        bool: True if the ball was present and stationary for the whole window.
+    """
+    start = frame_num + 1 - hold_len
+    if start < 0:
+        return False
+    x0 = ball_xy[start, 0]
+    y0 = ball_xy[start, 1]
+    max_dist_sq = 0.0
+    for f in range(start, frame_num + 1):
+        x = ball_xy[f, 0]
+        y = ball_xy[f, 1]
+        if np.isnan(x) or np.isnan(y):
+            return False
+        dx = x - x0
+        dy = y - y0
+        dist_sq = dx * dx + dy * dy
+        if dist_sq > max_dist_sq:
+            max_dist_sq = dist_sq
+    return max_dist_sq < hold_thr_sq
+
+@njit(cache=True)
+def is_starting_dribble(ball_xy, frame_num, dribble_thr):
+    """
+    Check whether the ball was stable and then pushed downwards over the last 4 frames.
+
+    Args:
+        ball_xy (np.ndarray): Ball centers of shape (N, 2), NaN where the ball is missing.
+        frame_num (int): Index of the current frame.
+        dribble_thr (float): Maximum vertical change (pixels) for the ball to count as stable.
+
+    Returns:
+        bool: True if a dribble starts at this frame.
+    """
+    if frame_num < 3:
+        return False
+    y1 = ball_xy[frame_num - 3, 1]
+    y2 = ball_xy[frame_num - 2, 1]
+    y3 = ball_xy[frame_num - 1, 1]
+    y4 = ball_xy[frame_num, 1]
+    # NaN propagates through the sum, so one check covers all four samples
+    if np.isnan(y1 + y2 + y3 + y4):
+        return False
+
+    return (abs(y2 - y1) < dribble_thr) & (y4 > y3 + 1) & (y3 > y2 + 1)
+
+@njit(cache=True)
+def run_segment(ball_xy, holder_xy, holder_idx, start, end, dribble_stopped, hold_len, hold_thr_sq, dribble_thr, travel_thr_sq, travel_inc, double_dribble_inc):
+    """
+    Run the travel and double-dribble state machine over frames [start, end).
+
+    Every player starts in the no-ball state, which holds at frame 0 and after any frame
+    where nobody has the ball. Only dribble_stopped carries over, so it is passed in and
+    updated in place.
+
+    Args:
+        ball_xy (np.ndarray): Ball centers of shape (N, 2), NaN where the ball is missing.
+        holder_xy (np.ndarray): Center of the player holding the ball, shape (N, 2), NaN if unknown.
+        holder_idx (np.ndarray): Dense index of the player holding the ball per frame, -1 for none.
+        start (int): First frame of the segment.
+        end (int): Frame after the last frame of the segment.
+        dribble_stopped (np.ndarray): Per-player flag for a stopped dribble, updated in place.
+        hold_len (int): Number of frames the ball must be stationary to count as held.
+        hold_thr_sq (float): Squared maximum ball movement (pixels) while held.
+        dribble_thr (float): Maximum vertical ball change (pixels) before a dribble starts.
+        travel_thr_sq (float): Squared player movement (pixels) while holding that counts as a travel.
+        travel_inc (np.ndarray): Output, set to 1 at frames where a travel is detected.
+        double_dribble_inc (np.ndarray): Output, set to 1 at frames where a double dribble is detected.
+    """
+    num_players = dribble_stopped.shape[0]
+
+    # Per-player state, indexed by dense player index
+    action = np.zeros(num_players, dtype=np.int8)
+    last_pos = np.full((num_players, 2), np.nan)
+    violation_committed = np.zeros(num_players, dtype=np.bool_)
+
+    # Every player other than the previous frame's holder is already in the reset state,
+    # so only the previous holder needs resetting when the ball changes hands
+    prev_player = -1
+    for frame_num in range(start, end):
+        player = holder_idx[frame_num]
+
+        if prev_player != -1 and prev_player != player:
+            if action[prev_player] != NO_BALL:
+                dribble_stopped[prev_player] = True
+            action[prev_player] = NO_BALL
+            violation_committed[prev_player] = False
+            last_pos[prev_player, 0] = np.nan
+            last_pos[prev_player, 1] = np.nan
+        prev_player = player
+
+        if player == -1:
+            continue
+        px = holder_xy[frame_num, 0]
+        py = holder_xy[frame_num, 1]
+        if np.isnan(px):
+            continue
+
+        holding = is_holding(ball_xy, frame_num, hold_len, hold_thr_sq)
+        starting_dribble = is_starting_dribble(ball_xy, frame_num, dribble_thr)
+
+        if starting_dribble and dribble_stopped[player] and not violation_committed[player]:
+            double_dribble_inc[frame_num] = 1
+            violation_committed[player] = True
+            dribble_stopped[player] = False
+
+        if holding:
+            if action[player] != HOLDING:  # Just entered holding state
+                dribble_stopped[player] = True
+                last_pos[player, 0] = px
+                last_pos[player, 1] = py
+            action[player] = HOLDING
+        else:
+            action[player] = TRANSIENT
+            last_pos[player, 0] = np.nan
+            last_pos[player, 1] = np.nan
+
+        # Travel check is only done while holding
+        if action[player] == HOLDING and not np.isnan(last_pos[player, 0]) and not violation_committed[player]:
+            dx = px - last_pos[player, 0]
+            dy = py - last_pos[player, 1]
+            if dx * dx + dy * dy > travel_thr_sq:
+                travel_inc[frame_num] = 1
+                violation_committed[player] = True
+                last_pos[player, 0] = px
+                last_pos[player, 1] = py
+
+@njit(cache=True)
+def _cumulative_counts(travel_inc, double_dribble_inc, holder_xy, holder_idx):
+    """Turn per-frame increments into running totals, leaving 0 on frames whose holder position is unknown."""
+    num_frames = holder_idx.shape[0]
+    travels = np.zeros(num_frames, dtype=np.int64)
+    double_dribbles = np.zeros(num_frames, dtype=np.int64)
+    total_travels = 0
+    total_double_dribbles = 0
+    for frame_num in range(num_frames):
+        total_travels += travel_inc[frame_num]
+        total_double_dribbles += double_dribble_inc[frame_num]
+        if holder_idx[frame_num] != -1 and np.isnan(holder_xy[frame_num, 0]):
+            continue
+        travels[frame_num] = total_travels
+        double_dribbles[frame_num] = total_double_dribbles
+    return travels, double_dribbles
+
+@njit(cache=True)
+def detect_violations_kernel(ball_xy, holder_xy, holder_idx, num_players, hold_len, hold_thr_sq, dribble_thr, travel_thr_sq):
+    """
+    Run the travel and double-dribble state machine over every frame.
+
+    Args:
+        ball_xy (np.ndarray): Ball centers of shape (N, 2), NaN where the ball is missing.
+        holder_xy (np.ndarray): Center of the player holding the ball, shape (N, 2), NaN if unknown.
+        holder_idx (np.ndarray): Dense index of the player holding the ball per frame, -1 for none.
+        num_players (int): Number of distinct players that ever hold the ball.
+        hold_len (int): Number of frames the ball must be stationary to count as held.
+        hold_thr_sq (float): Squared maximum ball movement (pixels) while held.
+        dribble_thr (float): Maximum vertical ball change (pixels) before a dribble starts.
+        travel_thr_sq (float): Squared player movement (pixels) while holding that counts as a travel.
+
+    Returns:
+        tuple: Cumulative (travels, double_dribbles) counts per frame as int64 arrays.
+    """
+    num_frames = holder_idx.shape[0]
+    travel_inc = np.zeros(num_frames, dtype=np.int64)
+    double_dribble_inc = np.zeros(num_frames, dtype=np.int64)
+    dribble_stopped = np.zeros(num_players, dtype=np.bool_)
+    run_segment(ball_xy, holder_xy, holder_idx, 0, num_frames, dribble_stopped,
+                hold_len, hold_thr_sq, dribble_thr, travel_thr_sq, travel_inc, double_dribble_inc)
+    return _cumulative_counts(travel_inc, double_dribble_inc, holder_xy, holder_idx)
+
+@njit(cache=True, parallel=True)
+def detect_violations_parallel(ball_xy, holder_xy, holder_idx, num_players, hold_len, hold_thr_sq, dribble_thr, travel_thr_sq):
+    """
+    Same as detect_violations_kernel, but runs independent segments in parallel.
+
+    A frame where nobody holds the ball resets every player except for the per-player
+    dribble_stopped flag, so the video is split after each such frame. A player's
+    results in a segment depend only on that player's own flag at the segment start.
+    Each segment is therefore run twice in parallel, once with all flags cleared and
+    once with all flags set. A serial pass then walks the segments in order and, for
+    each frame, takes the result matching the holder's actual flag.
+
+    Args and return value are the same as detect_violations_kernel.
+    """
+    num_frames = holder_idx.shape[0]
+
+    # Segments start at frame 0 and after every frame without a ball holder
+    num_segments = 0
+    for frame_num in range(num_frames):
+        if frame_num == 0 or holder_idx[frame_num - 1] == -1:
+            num_segments += 1
+    seg_start = np.empty(num_segments + 1, dtype=np.int64)
+    seg = 0
+    for frame_num in range(num_frames):
+        if frame_num == 0 or holder_idx[frame_num - 1] == -1:
+            seg_start[seg] = frame_num
+            seg += 1
+    seg_start[num_segments] = num_frames
+
+    # Row 0: every flag starts cleared, row 1: every flag starts set
+    travel_inc = np.zeros((2, num_frames), dtype=np.int64)
+    double_dribble_inc = np.zeros((2, num_frames), dtype=np.int64)
+    final_stopped = np.zeros((2, num_segments, num_players), dtype=np.bool_)
+    for task in prange(2 * num_segments):
+        seg = task // 2
+        flag = task % 2
+        dribble_stopped = np.full(num_players, flag == 1)
+        run_segment(ball_xy, holder_xy, holder_idx, seg_start[seg], seg_start[seg + 1], dribble_stopped,
+                    hold_len, hold_thr_sq, dribble_thr, travel_thr_sq, travel_inc[flag], double_dribble_inc[flag])
+        final_stopped[flag, seg] = dribble_stopped
+
+    # Stitch the segments together following each player's actual flag
+    merged_travel_inc = np.zeros(num_frames, dtype=np.int64)
+    merged_double_dribble_inc = np.zeros(num_frames, dtype=np.int64)
+    stopped = np.zeros(num_players, dtype=np.int64)
+    for seg in range(num_segments):
+        for frame_num in range(seg_start[seg], seg_start[seg + 1]):
+            player = holder_idx[frame_num]
+            if player != -1:
+                merged_travel_inc[frame_num] = travel_inc[stopped[player], frame_num]
+                merged_double_dribble_inc[frame_num] = double_dribble_inc[stopped[player], frame_num]
+        for player in range(num_players):
+            stopped[player] = final_stopped[stopped[player], seg, player]
+
+    return _cumulative_counts(merged_travel_inc, merged_double_dribble_inc, holder_xy, holder_idx)